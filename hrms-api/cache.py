@@ -0,0 +1,113 @@
+"""
+In-process response cache for read-heavy HRMS endpoints
+"""
+import os
+import threading
+import time
+from typing import Any, Hashable, Optional
+
+# Entries expire after this many seconds, bounding staleness across workers
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "60"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+# Keys hash onto this many generation counters; a collision only skips a store
+CACHE_GENERATION_SLOTS = 1024
+
+
+class TTLCache:
+    """
+    Thread-safe key/value cache with per-entry expiry
+    Each uvicorn worker holds its own copy; writes in this process
+    invalidate immediately, other workers catch up within the TTL
+    
+    Readers take generation(key) before querying and pass it to set(), so a
+    read that raced a write's invalidate() can't store its pre-write value
+    """
+
+    def __init__(self, ttl: int, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = {}
+        self._generations = [0] * CACHE_GENERATION_SLOTS
+        self._lock = threading.Lock()
+
+    def _slot(self, key: Hashable) -> int:
+        return hash(key) % CACHE_GENERATION_SLOTS
+
+    def generation(self, key: Hashable) -> int:
+        """Return the key's invalidation counter; take it before reading the database"""
+        with self._lock:
+            return self._generations[self._slot(key)]
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        """
+        Store a value for the configured TTL
+        Skipped if the key was invalidated since generation was taken
+        """
+        with self._lock:
+            if generation is not None and self._generations[self._slot(key)] != generation:
+                return
+            if key not in self._data and len(self._data) >= self.max_entries:
+                # Evict the oldest insertion to stay bounded
+                del self._data[next(iter(self._data))]
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, *keys: Hashable) -> None:
+        """Drop the given keys if present"""
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+                self._generations[self._slot(key)] += 1
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        with self._lock:
+            self._data.clear()
+            self._generations = [generation + 1 for generation in self._generations]
+
+
+cache = TTLCache(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES)
+
+
+def department_key(department_id: int) -> tuple:
+    return ("department", department_id)
+
+
+def department_stats_key(department_id: int) -> tuple:
+    return ("department_stats", department_id)
+
+
+def department_employees_key(department_id: int) -> tuple:
+    return ("department_employees", department_id)
+
+
+def employee_key(employee_id: int) -> tuple:
+    return ("employee", employee_id)
+
+
+def leave_request_key(leave_id: int) -> tuple:
+    return ("leave_request", leave_id)
+
+
+def invalidate_departments(*department_ids: Optional[int]) -> None:
+    """Drop cached detail, stats and employee list for departments whose data changed"""
+    keys = []
+    for department_id in department_ids:
+        if department_id is not None:
+            keys.extend((
+                department_key(department_id),
+                department_stats_key(department_id),
+                department_employees_key(department_id)
+            ))
+    cache.invalidate(*keys)
@@ -1,8 +1,10 @@
 """
 Database configuration and session management for HRMS
 """
-from sqlalchemy import create_engine
+from sqlalchemy import Index, create_engine, event, text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.schema import CreateIndex
 from sqlalchemy.pool import StaticPool
 import os
 from typing import Generator
@@ -24,16 +26,42 @@ if not DATABASE_URL:
 print(f"📊 Connecting to {ENVIRONMENT} database")
 print(f"🔗 Database URL: {DATABASE_URL.split('@')[0]}@****")
 
+# Connection pool configuration
+# Each uvicorn worker gets its own pool, so keep
+# (DB_POOL_SIZE + DB_MAX_OVERFLOW) * workers below PostgreSQL max_connections
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))  # Seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))  # Replace connections older than this
+DB_STATEMENT_TIMEOUT = os.getenv("DB_STATEMENT_TIMEOUT", "5s")  # Abort runaway queries
+
 # Create engine
 # For PostgreSQL in production
 engine = create_engine(
     DATABASE_URL,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
     echo=False  # Set to True for SQL debugging
 )
 
+if engine.dialect.name == "postgresql":
+    @event.listens_for(engine, "connect")
+    def configure_connection(dbapi_connection, connection_record):
+        """
+        Apply session settings once per physical connection
+        JIT compilation only adds planning overhead to these small OLTP queries
+        """
+        cursor = dbapi_connection.cursor()
+        cursor.execute("SET jit = off")
+        cursor.execute("SET statement_timeout = %s", (DB_STATEMENT_TIMEOUT,))
+        cursor.close()
+        # Commit so a later rollback on this connection doesn't undo the settings
+        dbapi_connection.commit()
+
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -46,19 +74,79 @@ def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
     try:
         yield db
+    except Exception:
+        # Don't hand an aborted transaction back to the pool
+        db.rollback()
+        raise
     finally:
         db.close()
 
 
+def is_unique_violation(error: IntegrityError, *names: str) -> bool:
+    """
+    Whether an IntegrityError came from one of the named unique indexes/constraints
+    PostgreSQL reports the constraint name in diag; SQLite only names the
+    index or table.column in its message, so callers pass both forms
+    """
+    diag = getattr(error.orig, "diag", None)
+    if diag is not None:
+        return diag.constraint_name in names
+    message = str(error.orig)
+    return message.startswith("UNIQUE constraint failed") and any(name in message for name in names)
+
+
 def init_db():
     """
     Initialize database - create all tables
     Call this on application startup
     """
     Base.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist, indexes included; add any
+    # missing ones so existing databases also get ix_departments_name_lower,
+    # which is what enforces case-insensitive department name uniqueness
+    for table in Base.metadata.tables.values():
+        for index in table.indexes:
+            create_index_if_missing(index)
+    if engine.dialect.name == "postgresql":
+        upgrade_salary_column()
     print(f"✅ Database tables created successfully in {ENVIRONMENT} environment")
 
 
+def create_index_if_missing(index: Index):
+    """
+    Build an index in its own transaction, without the statement timeout
+    A unique index that existing rows violate is reported and skipped
+    rather than stopping the application from starting
+    """
+    try:
+        with engine.begin() as connection:
+            if engine.dialect.name == "postgresql":
+                # Building an index on a large existing table can outlast DB_STATEMENT_TIMEOUT
+                connection.execute(text("SET LOCAL statement_timeout = 0"))
+            connection.execute(CreateIndex(index, if_not_exists=True))
+    except IntegrityError as e:
+        print(f"⚠️ Could not create unique index {index.name}; fix the duplicate rows and restart: {e.orig}")
+
+
+def upgrade_salary_column():
+    """
+    Convert employees.salary from double precision to numeric(12, 2) in place
+    Databases created before the column became Numeric keep the old type,
+    since create_all never alters existing tables
+    """
+    with engine.begin() as connection:
+        salary_type = connection.execute(text(
+            "SELECT data_type FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = 'employees' AND column_name = 'salary'"
+        )).scalar()
+        if salary_type != "double precision":
+            return
+        # The ALTER rewrites the table; don't let the per-connection statement_timeout abort it
+        connection.execute(text("SET LOCAL statement_timeout = 0"))
+        connection.execute(text("ALTER TABLE employees ALTER COLUMN salary TYPE numeric(12, 2)"))
+    print("✅ employees.salary converted to numeric(12, 2)")
+
+
 def drop_db():
     """
     Drop all tables - use with caution!
@@ -4,21 +4,29 @@ Main entry point for the Human Resource Management System
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from prometheus_client import make_asgi_app
 from routers import employees, departments, leaves
-from database import init_db
+from database import init_db, engine
+import metrics  # noqa: F401 - registers database pool and query metrics
 from contextlib import asynccontextmanager
+from types import MappingProxyType
+import os
+
+# Read once at import; the environment doesn't change for the life of the process
+ENVIRONMENT = os.getenv("ENVIRONMENT", "dev")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
     # Startup: Initialize database
-    import os
-    environment = os.getenv("ENVIRONMENT", "dev").upper()
+    environment = ENVIRONMENT.upper()
     print(f"🚀 Starting HRMS API in {environment} environment")
     print(f"🌍 Environment: {environment}")
     init_db()
     print("✅ Database initialized")
+    print(f"🏊 Connection pool: {engine.pool.status()}")
     yield
     # Shutdown
     print(f"👋 Shutting down HRMS API ({environment})...")
@@ -32,34 +40,31 @@ app = FastAPI(
         "name": "HRMS Development Team",
         "email": "support@hrms.example.com",
     },
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware configuration
-# Environment-aware CORS origins
-import os
-environment = os.getenv("ENVIRONMENT", "dev")
-
 # Configure allowed origins based on environment
-if environment.lower() == "prod" or environment.lower() == "production":
-    allowed_origins = [
+if ENVIRONMENT.lower() in ("prod", "production"):
+    ALLOWED_ORIGINS = [
         "https://dinesh-app1.zamait.in",
         "http://dinesh-app1.zamait.in",
         "https://hrms.zamait.in",
         "https://api.hrms.zamait.in"
     ]
-elif environment.lower() == "staging":
-    allowed_origins = [
+elif ENVIRONMENT.lower() == "staging":
+    ALLOWED_ORIGINS = [
         "https://staging.hrms.zamait.in",
         "https://staging-api.hrms.zamait.in"
     ]
-elif environment.lower() == "test":
-    allowed_origins = [
+elif ENVIRONMENT.lower() == "test":
+    ALLOWED_ORIGINS = [
         "https://test.hrms.zamait.in",
         "https://test-api.hrms.zamait.in"
     ]
 else:  # dev
-    allowed_origins = [
+    ALLOWED_ORIGINS = [
         "http://localhost:3000",
         "http://localhost:8000",
         "http://localhost",
@@ -70,7 +75,7 @@ else:  # dev
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=allowed_origins,
+    allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -81,6 +86,9 @@ app.include_router(employees.router, prefix="/api/v1/employees", tags=["Employee
 app.include_router(departments.router, prefix="/api/v1/departments", tags=["Departments"])
 app.include_router(leaves.router, prefix="/api/v1/leaves", tags=["Leave Management"])
 
+# Prometheus scrape endpoint
+app.mount("/metrics", make_asgi_app())
+
 
 @app.get("/", tags=["Root"])
 async def root():
@@ -93,15 +101,29 @@ async def root():
     }
 
 
+# Static payload, built once and shared read-only across requests
+HEALTH_RESPONSE = MappingProxyType({
+    "status": "healthy",
+    "service": "HRMS API",
+    "environment": ENVIRONMENT
+})
+
+
 @app.get("/health", tags=["Health"])
 async def health_check():
     """Health check endpoint"""
-    import os
-    environment = os.getenv("ENVIRONMENT", "dev")
+    return dict(HEALTH_RESPONSE)
+
+
+@app.get("/health/db", tags=["Health"])
+async def db_pool_health():
+    """Database connection pool status"""
+    pool = engine.pool
     return {
-        "status": "healthy",
-        "service": "HRMS API",
-        "environment": environment
+        "pool_size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "checked_in": pool.checkedin()
     }
 
 
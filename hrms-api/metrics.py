@@ -0,0 +1,45 @@
+"""
+Prometheus metrics for the database layer
+Exposed by main.py at /metrics
+"""
+from prometheus_client import Counter, Gauge
+from sqlalchemy import event
+from database import engine
+
+# Pool occupancy, read from the pool itself at scrape time
+POOL_SIZE = Gauge("db_pool_size", "Configured connection pool size")
+POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections currently checked out of the pool")
+POOL_CHECKED_IN = Gauge("db_pool_checked_in", "Idle connections currently held in the pool")
+POOL_OVERFLOW = Gauge("db_pool_overflow", "Connections opened beyond pool_size")
+
+POOL_SIZE.set_function(lambda: engine.pool.size())
+POOL_CHECKED_OUT.set_function(lambda: engine.pool.checkedout())
+POOL_CHECKED_IN.set_function(lambda: engine.pool.checkedin())
+POOL_OVERFLOW.set_function(lambda: engine.pool.overflow())
+
+# Pool and query activity, counted from SQLAlchemy events
+CONNECTIONS_OPENED = Counter("db_connections_opened_total", "New DBAPI connections opened")
+CONNECTIONS_INVALIDATED = Counter("db_connections_invalidated_total", "Connections invalidated after errors")
+CHECKOUTS = Counter("db_pool_checkouts_total", "Connections checked out of the pool")
+QUERIES = Counter("db_queries_total", "SQL statements executed")
+
+
+@event.listens_for(engine, "connect")
+def on_connect(dbapi_connection, connection_record):
+    CONNECTIONS_OPENED.inc()
+
+
+@event.listens_for(engine, "invalidate")
+def on_invalidate(dbapi_connection, connection_record, exception):
+    CONNECTIONS_INVALIDATED.inc()
+
+
+@event.listens_for(engine, "checkout")
+def on_checkout(dbapi_connection, connection_record, connection_proxy):
+    CHECKOUTS.inc()
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def on_execute(conn, cursor, statement, parameters, context, executemany):
+    # A jump in queries per request is the signature of an N+1 regression
+    QUERIES.inc()
@@ -1,35 +1,20 @@
 """
 SQLAlchemy Database Models for HRMS
 """
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Numeric, Date, ForeignKey, Index, func, Enum as SQLEnum
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import date
-import enum
+from models.schemas import EmployeeStatus, LeaveType, LeaveStatus
 
 Base = declarative_base()
 
 
-class EmployeeStatusEnum(str, enum.Enum):
-    ACTIVE = "active"
-    INACTIVE = "inactive"
-    ON_LEAVE = "on_leave"
-
-
-class LeaveTypeEnum(str, enum.Enum):
-    SICK = "sick"
-    VACATION = "vacation"
-    PERSONAL = "personal"
-    UNPAID = "unpaid"
-    MATERNITY = "maternity"
-    PATERNITY = "paternity"
-
-
-class LeaveStatusEnum(str, enum.Enum):
-    PENDING = "pending"
-    APPROVED = "approved"
-    REJECTED = "rejected"
-    CANCELLED = "cancelled"
+# The database columns use the API enums directly, so values read from the
+# ORM are already schema enums and need no per-row conversion
+EmployeeStatusEnum = EmployeeStatus
+LeaveTypeEnum = LeaveType
+LeaveStatusEnum = LeaveStatus
 
 
 class DepartmentModel(Base):
@@ -40,6 +25,11 @@ class DepartmentModel(Base):
     description = Column(String(500), nullable=False)
     manager_id = Column(Integer, ForeignKey("employees.id"), nullable=True)
     
+    # Case-insensitive uniqueness; also serves the lower(name) lookups in the router
+    __table_args__ = (
+        Index("ix_departments_name_lower", func.lower(name), unique=True),
+    )
+    
     # Relationships
     employees = relationship("EmployeeModel", back_populates="department", foreign_keys="EmployeeModel.department_id")
     manager = relationship("EmployeeModel", foreign_keys=[manager_id], post_update=True)
@@ -56,8 +46,13 @@ class EmployeeModel(Base):
     department_id = Column(Integer, ForeignKey("departments.id"), nullable=False)
     position = Column(String(100), nullable=False)
     hire_date = Column(Date, nullable=False)
-    salary = Column(Float, nullable=False)
-    status = Column(SQLEnum(EmployeeStatusEnum), default=EmployeeStatusEnum.ACTIVE, nullable=False)
+    salary = Column(Numeric(12, 2), nullable=False)
+    status = Column(SQLEnum(EmployeeStatusEnum, name="employeestatusenum"), default=EmployeeStatusEnum.ACTIVE, nullable=False)
+    
+    # Leading department_id also covers plain per-department lookups and counts
+    __table_args__ = (
+        Index("ix_employees_department_status", department_id, status),
+    )
     
     # Relationships
     department = relationship("DepartmentModel", back_populates="employees", foreign_keys=[department_id])
@@ -69,14 +64,20 @@ class LeaveRequestModel(Base):
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
-    leave_type = Column(SQLEnum(LeaveTypeEnum), nullable=False)
+    leave_type = Column(SQLEnum(LeaveTypeEnum, name="leavetypeenum"), nullable=False)
     start_date = Column(Date, nullable=False)
     end_date = Column(Date, nullable=False)
     reason = Column(String(500), nullable=False)
-    status = Column(SQLEnum(LeaveStatusEnum), default=LeaveStatusEnum.PENDING, nullable=False)
+    status = Column(SQLEnum(LeaveStatusEnum, name="leavestatusenum"), default=LeaveStatusEnum.PENDING, nullable=False)
     approved_by = Column(Integer, ForeignKey("employees.id"), nullable=True)
     created_at = Column(Date, default=date.today, nullable=False)
     
+    # Serve the overlapping-leave check on create and the filtered list endpoint
+    __table_args__ = (
+        Index("ix_leave_requests_employee_status_dates", employee_id, status, start_date, end_date),
+        Index("ix_leave_requests_employee_status_type", employee_id, status, leave_type),
+    )
+    
     # Relationships
     employee = relationship("EmployeeModel", back_populates="leave_requests", foreign_keys=[employee_id])
     approver = relationship("EmployeeModel", foreign_keys=[approved_by])
@@ -1,11 +1,17 @@
 """
 Pydantic models for HRMS application
 """
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 from typing import Optional, List
 from datetime import date
 from enum import Enum
 
+# Compiled once per model by pydantic-core using Rust's linear-time regex engine
+PHONE_PATTERN = r'^\+?1?\d{9,15}$'
+
+# Largest value employees.salary (Numeric(12, 2)) can hold; larger input would overflow it
+MAX_SALARY = 9_999_999_999.99
+
 
 class EmployeeStatus(str, Enum):
     """Employee status enumeration"""
@@ -19,11 +25,11 @@ class EmployeeBase(BaseModel):
     first_name: str = Field(..., min_length=1, max_length=50, description="Employee first name")
     last_name: str = Field(..., min_length=1, max_length=50, description="Employee last name")
     email: EmailStr = Field(..., description="Employee email address")
-    phone: str = Field(..., pattern=r'^\+?1?\d{9,15}$', description="Employee phone number")
+    phone: str = Field(..., pattern=PHONE_PATTERN, description="Employee phone number")
     department_id: int = Field(..., gt=0, description="Department ID")
     position: str = Field(..., min_length=1, max_length=100, description="Job position")
     hire_date: date = Field(..., description="Date of hiring")
-    salary: float = Field(..., gt=0, description="Employee salary")
+    salary: float = Field(..., gt=0, le=MAX_SALARY, description="Employee salary")
     status: EmployeeStatus = Field(default=EmployeeStatus.ACTIVE, description="Employee status")
 
 
@@ -37,10 +43,10 @@ class EmployeeUpdate(BaseModel):
     first_name: Optional[str] = Field(None, min_length=1, max_length=50)
     last_name: Optional[str] = Field(None, min_length=1, max_length=50)
     email: Optional[EmailStr] = None
-    phone: Optional[str] = Field(None, pattern=r'^\+?1?\d{9,15}$')
+    phone: Optional[str] = Field(None, pattern=PHONE_PATTERN)
     department_id: Optional[int] = Field(None, gt=0)
     position: Optional[str] = Field(None, min_length=1, max_length=100)
-    salary: Optional[float] = Field(None, gt=0)
+    salary: Optional[float] = Field(None, gt=0, le=MAX_SALARY)
     status: Optional[EmployeeStatus] = None
 
 
@@ -48,8 +54,9 @@ class Employee(EmployeeBase):
     """Complete employee model with ID"""
     id: int = Field(..., description="Employee ID")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        from_attributes=True,
+        json_schema_extra={
             "example": {
                 "id": 1,
                 "first_name": "John",
@@ -63,6 +70,7 @@ class Employee(EmployeeBase):
                 "status": "active"
             }
         }
+    )
 
 
 class DepartmentBase(BaseModel):
@@ -89,8 +97,9 @@ class Department(DepartmentBase):
     id: int = Field(..., description="Department ID")
     employee_count: int = Field(default=0, description="Number of employees in department")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        from_attributes=True,
+        json_schema_extra={
             "example": {
                 "id": 1,
                 "name": "Engineering",
@@ -99,6 +108,7 @@ class Department(DepartmentBase):
                 "employee_count": 15
             }
         }
+    )
 
 
 class LeaveType(str, Enum):
@@ -148,8 +158,9 @@ class LeaveRequest(LeaveRequestBase):
     approved_by: Optional[int] = Field(None, description="Approver employee ID")
     created_at: date = Field(..., description="Request creation date")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        from_attributes=True,
+        json_schema_extra={
             "example": {
                 "id": 1,
                 "employee_id": 3,
@@ -162,6 +173,7 @@ class LeaveRequest(LeaveRequestBase):
                 "created_at": "2024-12-01"
             }
         }
+    )
 
 
 class LeaveApproval(BaseModel):
@@ -4,31 +4,44 @@ CRUD operations for departments
 """
 from fastapi import APIRouter, HTTPException, status, Query, Depends
 from typing import List
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Session, Query as SAQuery, raiseload
+from sqlalchemy import func, case, exists, insert
+from sqlalchemy.exc import IntegrityError
 from models.schemas import Department, DepartmentCreate, DepartmentUpdate
-from models.database_models import DepartmentModel, EmployeeModel
-from database import get_db
+from models.database_models import DepartmentModel, EmployeeModel, EmployeeStatusEnum
+from database import get_db, is_unique_violation
+from cache import cache, department_key, department_stats_key, invalidate_departments
 
 router = APIRouter()
 
+# Unique indexes/constraints on the department name, as PostgreSQL and SQLite report them
+DEPARTMENT_NAME_CONSTRAINTS = ("ix_departments_name_lower", "departments_name_key", "departments.name")
 
-def db_department_to_schema(db_dept: DepartmentModel, employee_count: int = None) -> Department:
-    """Convert database model to Pydantic schema"""
-    if employee_count is None:
-        employee_count = len(db_dept.employees) if db_dept.employees else 0
-    
-    return Department(
-        id=db_dept.id,
-        name=db_dept.name,
-        description=db_dept.description,
-        manager_id=db_dept.manager_id,
-        employee_count=employee_count
+# INSERT ... RETURNING id: one statement yields the new key, no refresh SELECT needed
+INSERT_DEPARTMENT = insert(DepartmentModel).returning(DepartmentModel.id)
+
+
+def query_departments_with_counts(db: Session) -> SAQuery:
+    """
+    Department columns plus their employee count, one row per department.
+    Rows carry the Department schema field names, so they can be passed
+    straight to Department.model_validate without loading ORM instances.
+    """
+    return (
+        db.query(
+            DepartmentModel.id,
+            DepartmentModel.name,
+            DepartmentModel.description,
+            DepartmentModel.manager_id,
+            func.count(EmployeeModel.id).label("employee_count")
+        )
+        .outerjoin(EmployeeModel, EmployeeModel.department_id == DepartmentModel.id)
+        .group_by(DepartmentModel.id)
     )
 
 
 @router.get("/", response_model=List[Department], summary="Get all departments")
-async def get_departments(
+def get_departments(
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
     db: Session = Depends(get_db)
@@ -39,38 +52,50 @@ async def get_departments(
     - **skip**: Pagination offset
     - **limit**: Maximum number of results
     """
-    departments = db.query(DepartmentModel).offset(skip).limit(limit).all()
-    
-    result = []
-    for dept in departments:
-        emp_count = db.query(func.count(EmployeeModel.id)).filter(EmployeeModel.department_id == dept.id).scalar()
-        result.append(db_department_to_schema(dept, emp_count))
+    # Paginate departments first, then join employee counts onto that page
+    # so the whole listing is a single round trip instead of one COUNT per row
+    page = db.query(DepartmentModel.id).order_by(DepartmentModel.id).offset(skip).limit(limit).subquery()
+    
+    rows = (
+        query_departments_with_counts(db)
+        .join(page, page.c.id == DepartmentModel.id)
+        .order_by(DepartmentModel.id)
+        .all()
+    )
     
-    return result
+    # Rows carry the Department field names, so response_model validates them as-is
+    return rows
 
 
 @router.get("/{department_id}", response_model=Department, summary="Get department by ID")
-async def get_department(department_id: int, db: Session = Depends(get_db)):
+def get_department(department_id: int, db: Session = Depends(get_db)):
     """
     Retrieve a specific department by ID
     
     - **department_id**: The ID of the department to retrieve
     """
-    department = db.query(DepartmentModel).filter(DepartmentModel.id == department_id).first()
+    key = department_key(department_id)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    generation = cache.generation(key)
     
-    if not department:
+    row = query_departments_with_counts(db).filter(DepartmentModel.id == department_id).first()
+    
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Department with ID {department_id} not found"
         )
     
-    emp_count = db.query(func.count(EmployeeModel.id)).filter(EmployeeModel.department_id == department_id).scalar()
+    department = Department.model_validate(row)
+    cache.set(key, department, generation)
     
-    return db_department_to_schema(department, emp_count)
+    return department
 
 
 @router.post("/", response_model=Department, status_code=status.HTTP_201_CREATED, summary="Create new department")
-async def create_department(department: DepartmentCreate, db: Session = Depends(get_db)):
+def create_department(department: DepartmentCreate, db: Session = Depends(get_db)):
     """
     Create a new department
     
@@ -78,49 +103,43 @@ async def create_department(department: DepartmentCreate, db: Session = Depends(
     - **description**: Department description
     - **manager_id**: Optional employee ID of the department manager
     """
-    # Check name uniqueness
-    existing = db.query(DepartmentModel).filter(
-        func.lower(DepartmentModel.name) == department.name.lower()
-    ).first()
-    
-    if existing:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Department with name '{department.name}' already exists"
-        )
-    
     # Validate manager exists if provided
     if department.manager_id is not None:
-        manager = db.query(EmployeeModel).filter(EmployeeModel.id == department.manager_id).first()
-        if not manager:
+        manager_exists = db.query(exists().where(EmployeeModel.id == department.manager_id)).scalar()
+        if not manager_exists:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Employee with ID {department.manager_id} does not exist"
             )
     
     # Create new department
-    db_department = DepartmentModel(
-        name=department.name,
-        description=department.description,
-        manager_id=department.manager_id
-    )
-    
-    db.add(db_department)
-    db.commit()
-    db.refresh(db_department)
+    # Name uniqueness is enforced by the case-insensitive unique index
+    values = department.model_dump()
+    try:
+        department_id = db.execute(INSERT_DEPARTMENT, values).scalar_one()
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if not is_unique_violation(e, *DEPARTMENT_NAME_CONSTRAINTS):
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Department with name '{department.name}' already exists"
+        )
     
-    return db_department_to_schema(db_department, 0)
+    # A new department has no employees; employee_count keeps its default of 0
+    return Department(id=department_id, **values)
 
 
 @router.put("/{department_id}", response_model=Department, summary="Update department")
-async def update_department(department_id: int, department_update: DepartmentUpdate, db: Session = Depends(get_db)):
+def update_department(department_id: int, department_update: DepartmentUpdate, db: Session = Depends(get_db)):
     """
     Update an existing department
     
     - **department_id**: The ID of the department to update
     - All fields are optional; only provided fields will be updated
     """
-    db_department = db.query(DepartmentModel).filter(DepartmentModel.id == department_id).first()
+    db_department = db.get(DepartmentModel, department_id)
     
     if not db_department:
         raise HTTPException(
@@ -130,23 +149,10 @@ async def update_department(department_id: int, department_update: DepartmentUpd
     
     update_data = department_update.model_dump(exclude_unset=True)
     
-    # Check name uniqueness if being updated
-    if "name" in update_data and update_data["name"] is not None:
-        existing = db.query(DepartmentModel).filter(
-            func.lower(DepartmentModel.name) == update_data["name"].lower(),
-            DepartmentModel.id != department_id
-        ).first()
-        
-        if existing:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Department with name '{update_data['name']}' already exists"
-            )
-    
     # Validate manager exists if being updated
     if "manager_id" in update_data and update_data["manager_id"] is not None:
-        manager = db.query(EmployeeModel).filter(EmployeeModel.id == update_data["manager_id"]).first()
-        if not manager:
+        manager_exists = db.query(exists().where(EmployeeModel.id == update_data["manager_id"])).scalar()
+        if not manager_exists:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Employee with ID {update_data['manager_id']} does not exist"
@@ -156,16 +162,26 @@ async def update_department(department_id: int, department_update: DepartmentUpd
     for key, value in update_data.items():
         setattr(db_department, key, value)
     
-    db.commit()
-    db.refresh(db_department)
+    # Name uniqueness is enforced by the case-insensitive unique index
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if not is_unique_violation(e, *DEPARTMENT_NAME_CONSTRAINTS):
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Department with name '{update_data['name']}' already exists"
+        )
+    invalidate_departments(department_id)
     
-    emp_count = db.query(func.count(EmployeeModel.id)).filter(EmployeeModel.department_id == department_id).scalar()
+    row = query_departments_with_counts(db).filter(DepartmentModel.id == department_id).one()
     
-    return db_department_to_schema(db_department, emp_count)
+    return Department.model_validate(row)
 
 
 @router.delete("/{department_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Delete department")
-async def delete_department(department_id: int, db: Session = Depends(get_db)):
+def delete_department(department_id: int, db: Session = Depends(get_db)):
     """
     Delete a department
     
@@ -173,7 +189,7 @@ async def delete_department(department_id: int, db: Session = Depends(get_db)):
     
     Note: Cannot delete a department with active employees
     """
-    db_department = db.query(DepartmentModel).filter(DepartmentModel.id == department_id).first()
+    db_department = db.get(DepartmentModel, department_id)
     
     if not db_department:
         raise HTTPException(
@@ -192,18 +208,26 @@ async def delete_department(department_id: int, db: Session = Depends(get_db)):
     
     db.delete(db_department)
     db.commit()
+    invalidate_departments(department_id)
     
     return None
 
 
 @router.get("/{department_id}/stats", summary="Get department statistics")
-async def get_department_stats(department_id: int, db: Session = Depends(get_db)):
+def get_department_stats(department_id: int, db: Session = Depends(get_db)):
     """
     Get statistics for a specific department
     
     - **department_id**: The department ID
     """
-    department = db.query(DepartmentModel).filter(DepartmentModel.id == department_id).first()
+    key = department_stats_key(department_id)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    generation = cache.generation(key)
+    
+    # Only scalar columns are read here, so forbid relationship loads
+    department = db.get(DepartmentModel, department_id, options=[raiseload("*")])
     
     if not department:
         raise HTTPException(
@@ -211,20 +235,23 @@ async def get_department_stats(department_id: int, db: Session = Depends(get_db)
             detail=f"Department with ID {department_id} not found"
         )
     
-    employees = db.query(EmployeeModel).filter(EmployeeModel.department_id == department_id).all()
-    
-    total_salary = sum(emp.salary for emp in employees)
-    avg_salary = total_salary / len(employees) if employees else 0
-    active_count = sum(1 for emp in employees if emp.status.value == "active")
+    # Aggregate in the database instead of loading every employee row
+    total_employees, total_salary, avg_salary, active_count = db.query(
+        func.count(EmployeeModel.id),
+        func.coalesce(func.sum(EmployeeModel.salary), 0),
+        func.coalesce(func.avg(EmployeeModel.salary), 0),
+        func.coalesce(func.sum(case((EmployeeModel.status == EmployeeStatusEnum.ACTIVE, 1), else_=0)), 0),
+    ).filter(EmployeeModel.department_id == department_id).one()
     
     stats = {
         "department_id": department_id,
         "department_name": department.name,
-        "total_employees": len(employees),
+        "total_employees": total_employees,
         "active_employees": active_count,
-        "total_salary_expense": total_salary,
-        "average_salary": round(avg_salary, 2),
+        "total_salary_expense": float(total_salary),
+        "average_salary": round(float(avg_salary), 2),
         "manager_id": department.manager_id
     }
+    cache.set(key, stats, generation)
     
     return stats
@@ -3,37 +3,43 @@ Employee Management Router with SQLAlchemy
 CRUD operations for employees
 """
 from fastapi import APIRouter, HTTPException, status, Query, Depends
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Session, raiseload
+from sqlalchemy import func, delete, update, select
+from sqlalchemy.exc import IntegrityError
 from models.schemas import Employee, EmployeeCreate, EmployeeUpdate, EmployeeStatus
-from models.database_models import EmployeeModel, DepartmentModel, EmployeeStatusEnum
-from database import get_db
+from models.database_models import EmployeeModel, DepartmentModel
+from database import get_db, is_unique_violation
+from routers.streaming import stream_json_array
+from cache import cache, employee_key, department_employees_key, invalidate_departments
 
 router = APIRouter()
 
+EMPLOYEE_LIST_ADAPTER = TypeAdapter(List[Employee])
 
-def db_employee_to_schema(db_employee: EmployeeModel) -> Employee:
-    """Convert database model to Pydantic schema"""
-    return Employee(
-        id=db_employee.id,
-        first_name=db_employee.first_name,
-        last_name=db_employee.last_name,
-        email=db_employee.email,
-        phone=db_employee.phone,
-        department_id=db_employee.department_id,
-        position=db_employee.position,
-        hire_date=db_employee.hire_date,
-        salary=db_employee.salary,
-        status=EmployeeStatus(db_employee.status.value)
-    )
+# Unique index on the employee email, as PostgreSQL and SQLite report it
+EMPLOYEE_EMAIL_CONSTRAINTS = ("ix_employees_email", "employees.email")
+
+
+def filter_employees(statement, department_id: Optional[int], status_filter: Optional[EmployeeStatus]):
+    """Apply the filters shared by the list and export endpoints"""
+    if department_id is not None:
+        statement = statement.where(EmployeeModel.department_id == department_id)
+    
+    if status_filter is not None:
+        statement = statement.where(EmployeeModel.status == status_filter)
+    
+    return statement
 
 
 @router.get("/", response_model=List[Employee], summary="Get all employees")
-async def get_employees(
+def get_employees(
     department_id: Optional[int] = Query(None, description="Filter by department ID"),
     status_filter: Optional[EmployeeStatus] = Query(None, alias="status", description="Filter by employee status"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
+    after_id: Optional[int] = Query(None, ge=0, description="Return records with ID greater than this (keyset pagination)"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
     db: Session = Depends(get_db)
 ):
@@ -43,31 +49,57 @@ async def get_employees(
     - **department_id**: Filter employees by department
     - **status**: Filter employees by status (active, inactive, on_leave)
     - **skip**: Pagination offset
+    - **after_id**: Keyset cursor; pass the last ID of the previous page instead of skip
     - **limit**: Maximum number of results
     """
-    query = db.query(EmployeeModel)
+    # Responses only use scalar columns; fail loudly rather than lazy-load per row
+    statement = filter_employees(select(EmployeeModel).options(raiseload("*")), department_id, status_filter)
     
-    # Apply filters
-    if department_id is not None:
-        query = query.filter(EmployeeModel.department_id == department_id)
+    # Apply pagination
+    # Keyset mode seeks straight to the cursor on the primary key index,
+    # so deep pages cost the same as the first; offset mode is kept for existing clients
+    statement = statement.order_by(EmployeeModel.id)
+    if after_id is not None:
+        statement = statement.where(EmployeeModel.id > after_id)
+    else:
+        statement = statement.offset(skip)
     
-    if status_filter is not None:
-        query = query.filter(EmployeeModel.status == EmployeeStatusEnum(status_filter.value))
+    employees = db.scalars(statement.limit(limit)).all()
     
-    # Apply pagination
-    employees = query.offset(skip).limit(limit).all()
+    return employees
+
+
+@router.get("/export", response_model=List[Employee], summary="Export all employees")
+def export_employees(
+    department_id: Optional[int] = Query(None, description="Filter by department ID"),
+    status_filter: Optional[EmployeeStatus] = Query(None, alias="status", description="Filter by employee status")
+):
+    """
+    Stream every matching employee as a JSON array, without pagination
     
-    return [db_employee_to_schema(emp) for emp in employees]
+    - **department_id**: Filter employees by department
+    - **status**: Filter employees by status (active, inactive, on_leave)
+    """
+    statement = filter_employees(select(EmployeeModel).options(raiseload("*")), department_id, status_filter)
+    statement = statement.order_by(EmployeeModel.id)
+    
+    return StreamingResponse(stream_json_array(statement, EMPLOYEE_LIST_ADAPTER), media_type="application/json")
 
 
 @router.get("/{employee_id}", response_model=Employee, summary="Get employee by ID")
-async def get_employee(employee_id: int, db: Session = Depends(get_db)):
+def get_employee(employee_id: int, db: Session = Depends(get_db)):
     """
     Retrieve a specific employee by ID
     
     - **employee_id**: The ID of the employee to retrieve
     """
-    employee = db.query(EmployeeModel).filter(EmployeeModel.id == employee_id).first()
+    key = employee_key(employee_id)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    generation = cache.generation(key)
+    
+    employee = db.get(EmployeeModel, employee_id)
     
     if not employee:
         raise HTTPException(
@@ -75,11 +107,14 @@ async def get_employee(employee_id: int, db: Session = Depends(get_db)):
             detail=f"Employee with ID {employee_id} not found"
         )
     
-    return db_employee_to_schema(employee)
+    result = Employee.model_validate(employee)
+    cache.set(key, result, generation)
+    
+    return result
 
 
 @router.post("/", response_model=Employee, status_code=status.HTTP_201_CREATED, summary="Create new employee")
-async def create_employee(employee: EmployeeCreate, db: Session = Depends(get_db)):
+def create_employee(employee: EmployeeCreate, db: Session = Depends(get_db)):
     """
     Create a new employee
     
@@ -94,21 +129,13 @@ async def create_employee(employee: EmployeeCreate, db: Session = Depends(get_db
     - **status**: Employment status (default: active)
     """
     # Validate department exists
-    department = db.query(DepartmentModel).filter(DepartmentModel.id == employee.department_id).first()
+    department = db.get(DepartmentModel, employee.department_id)
     if not department:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Department with ID {employee.department_id} does not exist"
         )
     
-    # Check email uniqueness
-    existing_employee = db.query(EmployeeModel).filter(EmployeeModel.email == employee.email).first()
-    if existing_employee:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Email {employee.email} is already registered"
-        )
-    
     # Create new employee
     db_employee = EmployeeModel(
         first_name=employee.first_name,
@@ -119,104 +146,151 @@ async def create_employee(employee: EmployeeCreate, db: Session = Depends(get_db
         position=employee.position,
         hire_date=employee.hire_date,
         salary=employee.salary,
-        status=EmployeeStatusEnum(employee.status.value)
+        status=employee.status
     )
     
     db.add(db_employee)
-    db.commit()
+    # Email uniqueness is enforced by the unique index on employees.email
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if not is_unique_violation(e, *EMPLOYEE_EMAIL_CONSTRAINTS):
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Email {employee.email} is already registered"
+        )
     db.refresh(db_employee)
+    invalidate_departments(db_employee.department_id)
     
-    return db_employee_to_schema(db_employee)
+    return db_employee
 
 
 @router.put("/{employee_id}", response_model=Employee, summary="Update employee")
-async def update_employee(employee_id: int, employee_update: EmployeeUpdate, db: Session = Depends(get_db)):
+def update_employee(employee_id: int, employee_update: EmployeeUpdate, db: Session = Depends(get_db)):
     """
     Update an existing employee
     
     - **employee_id**: The ID of the employee to update
     - All fields are optional; only provided fields will be updated
     """
-    db_employee = db.query(EmployeeModel).filter(EmployeeModel.id == employee_id).first()
-    
-    if not db_employee:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Employee with ID {employee_id} not found"
-        )
-    
     update_data = employee_update.model_dump(exclude_unset=True)
     
+    if not update_data:
+        db_employee = db.get(EmployeeModel, employee_id)
+        if not db_employee:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Employee with ID {employee_id} not found"
+            )
+        return db_employee
+    
     # Validate department if being updated
+    previous_department_id = None
     if "department_id" in update_data and update_data["department_id"] is not None:
-        department = db.query(DepartmentModel).filter(DepartmentModel.id == update_data["department_id"]).first()
+        department = db.get(DepartmentModel, update_data["department_id"])
         if not department:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Department with ID {update_data['department_id']} does not exist"
             )
+        # Department stats are cached, so the department being left needs invalidating too
+        previous_department_id = db.query(EmployeeModel.department_id).filter(
+            EmployeeModel.id == employee_id
+        ).scalar()
     
-    # Check email uniqueness if being updated
-    if "email" in update_data and update_data["email"] is not None:
-        existing = db.query(EmployeeModel).filter(
-            EmployeeModel.email == update_data["email"],
-            EmployeeModel.id != employee_id
-        ).first()
-        if existing:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Email {update_data['email']} is already registered"
-            )
-    
-    # Convert status enum if present
-    if "status" in update_data and update_data["status"] is not None:
-        update_data["status"] = EmployeeStatusEnum(update_data["status"].value)
+    # Single UPDATE ... RETURNING: no pre-SELECT and no refresh after commit
+    # Email uniqueness is enforced by the unique index on employees.email
+    try:
+        db_employee = db.scalars(
+            update(EmployeeModel)
+            .where(EmployeeModel.id == employee_id)
+            .values(**update_data)
+            .returning(EmployeeModel)
+        ).one_or_none()
+        # Snapshot the returned row before commit expires it
+        result = Employee.model_validate(db_employee) if db_employee else None
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if not is_unique_violation(e, *EMPLOYEE_EMAIL_CONSTRAINTS):
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Email {update_data['email']} is already registered"
+        )
     
-    # Update employee
-    for key, value in update_data.items():
-        setattr(db_employee, key, value)
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Employee with ID {employee_id} not found"
+        )
     
-    db.commit()
-    db.refresh(db_employee)
+    cache.invalidate(employee_key(employee_id))
+    invalidate_departments(previous_department_id, result.department_id)
     
-    return db_employee_to_schema(db_employee)
+    return result
 
 
 @router.delete("/{employee_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Delete employee")
-async def delete_employee(employee_id: int, db: Session = Depends(get_db)):
+def delete_employee(employee_id: int, db: Session = Depends(get_db)):
     """
     Delete an employee
     
     - **employee_id**: The ID of the employee to delete
     """
-    db_employee = db.query(EmployeeModel).filter(EmployeeModel.id == employee_id).first()
+    # Single DELETE ... RETURNING; EmployeeModel has no ORM cascades to run,
+    # so there's no need to load the row first
+    try:
+        department_id = db.execute(
+            delete(EmployeeModel)
+            .where(EmployeeModel.id == employee_id)
+            .returning(EmployeeModel.department_id)
+        ).scalar_one_or_none()
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot delete employee referenced by leave requests or as a department manager."
+        )
     
-    if not db_employee:
+    if department_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Employee with ID {employee_id} not found"
         )
     
-    db.delete(db_employee)
-    db.commit()
+    cache.invalidate(employee_key(employee_id))
+    invalidate_departments(department_id)
     
     return None
 
 
 @router.get("/department/{department_id}/employees", response_model=List[Employee], summary="Get employees by department")
-async def get_employees_by_department(department_id: int, db: Session = Depends(get_db)):
+def get_employees_by_department(department_id: int, db: Session = Depends(get_db)):
     """
     Retrieve all employees in a specific department
     
     - **department_id**: The department ID
     """
-    department = db.query(DepartmentModel).filter(DepartmentModel.id == department_id).first()
+    key = department_employees_key(department_id)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    generation = cache.generation(key)
+    
+    department = db.get(DepartmentModel, department_id)
     if not department:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Department with ID {department_id} not found"
         )
     
-    employees = db.query(EmployeeModel).filter(EmployeeModel.department_id == department_id).all()
+    employees = db.query(EmployeeModel).options(raiseload("*")).filter(EmployeeModel.department_id == department_id).all()
+    
+    result = [Employee.model_validate(emp) for emp in employees]
+    cache.set(key, result, generation)
     
-    return [db_employee_to_schema(emp) for emp in employees]
+    return result
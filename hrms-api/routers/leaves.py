@@ -3,40 +3,52 @@ Leave Management Router with SQLAlchemy
 CRUD operations for leave requests
 """
 from fastapi import APIRouter, HTTPException, status, Query, Depends
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from typing import List, Optional
 from datetime import date
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, raiseload
+from sqlalchemy import func, select
 from models.schemas import (
     LeaveRequest, LeaveRequestCreate, LeaveRequestUpdate,
     LeaveApproval, LeaveStatus, LeaveType
 )
 from models.database_models import LeaveRequestModel, EmployeeModel, LeaveTypeEnum, LeaveStatusEnum
 from database import get_db
+from routers.streaming import stream_json_array
+from cache import cache, leave_request_key
 
 router = APIRouter()
 
+LEAVE_LIST_ADAPTER = TypeAdapter(List[LeaveRequest])
 
-def db_leave_to_schema(db_leave: LeaveRequestModel) -> LeaveRequest:
-    """Convert database model to Pydantic schema"""
-    return LeaveRequest(
-        id=db_leave.id,
-        employee_id=db_leave.employee_id,
-        leave_type=LeaveType(db_leave.leave_type.value),
-        start_date=db_leave.start_date,
-        end_date=db_leave.end_date,
-        reason=db_leave.reason,
-        status=LeaveStatus(db_leave.status.value),
-        approved_by=db_leave.approved_by,
-        created_at=db_leave.created_at
-    )
+
+def filter_leave_requests(
+    statement,
+    employee_id: Optional[int],
+    status_filter: Optional[LeaveStatus],
+    leave_type: Optional[LeaveType]
+):
+    """Apply the filters shared by the list and export endpoints"""
+    if employee_id is not None:
+        statement = statement.where(LeaveRequestModel.employee_id == employee_id)
+    
+    if status_filter is not None:
+        statement = statement.where(LeaveRequestModel.status == status_filter)
+    
+    if leave_type is not None:
+        statement = statement.where(LeaveRequestModel.leave_type == leave_type)
+    
+    return statement
 
 
 @router.get("/", response_model=List[LeaveRequest], summary="Get all leave requests")
-async def get_leave_requests(
+def get_leave_requests(
     employee_id: Optional[int] = Query(None, description="Filter by employee ID"),
     status_filter: Optional[LeaveStatus] = Query(None, alias="status", description="Filter by leave status"),
     leave_type: Optional[LeaveType] = Query(None, description="Filter by leave type"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
+    after_id: Optional[int] = Query(None, ge=0, description="Return records with ID greater than this (keyset pagination)"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
     db: Session = Depends(get_db)
 ):
@@ -47,34 +59,63 @@ async def get_leave_requests(
     - **status**: Filter by leave status (pending, approved, rejected, cancelled)
     - **leave_type**: Filter by leave type (sick, vacation, personal, etc.)
     - **skip**: Pagination offset
+    - **after_id**: Keyset cursor; pass the last ID of the previous page instead of skip
     - **limit**: Maximum number of results
     """
-    query = db.query(LeaveRequestModel)
+    # Responses only use scalar columns; fail loudly rather than lazy-load per row
+    statement = filter_leave_requests(
+        select(LeaveRequestModel).options(raiseload("*")), employee_id, status_filter, leave_type
+    )
     
-    # Apply filters
-    if employee_id is not None:
-        query = query.filter(LeaveRequestModel.employee_id == employee_id)
+    # Apply pagination
+    # Keyset mode seeks straight to the cursor on the primary key index,
+    # so deep pages cost the same as the first; offset mode is kept for existing clients
+    statement = statement.order_by(LeaveRequestModel.id)
+    if after_id is not None:
+        statement = statement.where(LeaveRequestModel.id > after_id)
+    else:
+        statement = statement.offset(skip)
     
-    if status_filter is not None:
-        query = query.filter(LeaveRequestModel.status == LeaveStatusEnum(status_filter.value))
+    leave_requests = db.scalars(statement.limit(limit)).all()
     
-    if leave_type is not None:
-        query = query.filter(LeaveRequestModel.leave_type == LeaveTypeEnum(leave_type.value))
+    return leave_requests
+
+
+@router.get("/export", response_model=List[LeaveRequest], summary="Export all leave requests")
+def export_leave_requests(
+    employee_id: Optional[int] = Query(None, description="Filter by employee ID"),
+    status_filter: Optional[LeaveStatus] = Query(None, alias="status", description="Filter by leave status"),
+    leave_type: Optional[LeaveType] = Query(None, description="Filter by leave type")
+):
+    """
+    Stream every matching leave request as a JSON array, without pagination
     
-    # Apply pagination
-    leave_requests = query.offset(skip).limit(limit).all()
+    - **employee_id**: Filter by specific employee
+    - **status**: Filter by leave status (pending, approved, rejected, cancelled)
+    - **leave_type**: Filter by leave type (sick, vacation, personal, etc.)
+    """
+    statement = filter_leave_requests(
+        select(LeaveRequestModel).options(raiseload("*")), employee_id, status_filter, leave_type
+    )
+    statement = statement.order_by(LeaveRequestModel.id)
     
-    return [db_leave_to_schema(lr) for lr in leave_requests]
+    return StreamingResponse(stream_json_array(statement, LEAVE_LIST_ADAPTER), media_type="application/json")
 
 
 @router.get("/{leave_id}", response_model=LeaveRequest, summary="Get leave request by ID")
-async def get_leave_request(leave_id: int, db: Session = Depends(get_db)):
+def get_leave_request(leave_id: int, db: Session = Depends(get_db)):
     """
     Retrieve a specific leave request by ID
     
     - **leave_id**: The ID of the leave request to retrieve
     """
-    leave_request = db.query(LeaveRequestModel).filter(LeaveRequestModel.id == leave_id).first()
+    key = leave_request_key(leave_id)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    generation = cache.generation(key)
+    
+    leave_request = db.get(LeaveRequestModel, leave_id)
     
     if not leave_request:
         raise HTTPException(
@@ -82,11 +123,14 @@ async def get_leave_request(leave_id: int, db: Session = Depends(get_db)):
             detail=f"Leave request with ID {leave_id} not found"
         )
     
-    return db_leave_to_schema(leave_request)
+    result = LeaveRequest.model_validate(leave_request)
+    cache.set(key, result, generation)
+    
+    return result
 
 
 @router.post("/", response_model=LeaveRequest, status_code=status.HTTP_201_CREATED, summary="Create leave request")
-async def create_leave_request(leave_request: LeaveRequestCreate, db: Session = Depends(get_db)):
+def create_leave_request(leave_request: LeaveRequestCreate, db: Session = Depends(get_db)):
     """
     Create a new leave request
     
@@ -96,8 +140,9 @@ async def create_leave_request(leave_request: LeaveRequestCreate, db: Session =
     - **end_date**: Leave end date (must be >= start_date)
     - **reason**: Reason for requesting leave
     """
-    # Validate employee exists
-    employee = db.query(EmployeeModel).filter(EmployeeModel.id == leave_request.employee_id).first()
+    # Validate employee exists, locking their row so concurrent requests for the
+    # same employee run the overlap check and insert one at a time
+    employee = db.get(EmployeeModel, leave_request.employee_id, with_for_update=True)
     if not employee:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -112,25 +157,26 @@ async def create_leave_request(leave_request: LeaveRequestCreate, db: Session =
         )
     
     # Check for overlapping leave requests
-    overlapping = db.query(LeaveRequestModel).filter(
+    # Fetch only the id of the first clash; no ORM row is hydrated
+    overlapping_id = db.query(LeaveRequestModel.id).filter(
         LeaveRequestModel.employee_id == leave_request.employee_id,
         LeaveRequestModel.status.in_([LeaveStatusEnum.PENDING, LeaveStatusEnum.APPROVED]),
         ~(
             (LeaveRequestModel.end_date < leave_request.start_date) |
             (LeaveRequestModel.start_date > leave_request.end_date)
         )
-    ).first()
+    ).limit(1).scalar()
     
-    if overlapping:
+    if overlapping_id is not None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Leave request overlaps with existing leave request (ID: {overlapping.id})"
+            detail=f"Leave request overlaps with existing leave request (ID: {overlapping_id})"
         )
     
     # Create new leave request
     db_leave = LeaveRequestModel(
         employee_id=leave_request.employee_id,
-        leave_type=LeaveTypeEnum(leave_request.leave_type.value),
+        leave_type=leave_request.leave_type,
         start_date=leave_request.start_date,
         end_date=leave_request.end_date,
         reason=leave_request.reason,
@@ -143,11 +189,11 @@ async def create_leave_request(leave_request: LeaveRequestCreate, db: Session =
     db.commit()
     db.refresh(db_leave)
     
-    return db_leave_to_schema(db_leave)
+    return db_leave
 
 
 @router.put("/{leave_id}", response_model=LeaveRequest, summary="Update leave request")
-async def update_leave_request(leave_id: int, leave_update: LeaveRequestUpdate, db: Session = Depends(get_db)):
+def update_leave_request(leave_id: int, leave_update: LeaveRequestUpdate, db: Session = Depends(get_db)):
     """
     Update a pending leave request
     
@@ -155,7 +201,8 @@ async def update_leave_request(leave_id: int, leave_update: LeaveRequestUpdate,
     - Only pending leave requests can be updated
     - All fields are optional; only provided fields will be updated
     """
-    db_leave = db.query(LeaveRequestModel).filter(LeaveRequestModel.id == leave_id).first()
+    # Lock the row so the pending-status check and the write can't interleave
+    db_leave = db.get(LeaveRequestModel, leave_id, with_for_update=True)
     
     if not db_leave:
         raise HTTPException(
@@ -182,29 +229,27 @@ async def update_leave_request(leave_id: int, leave_update: LeaveRequestUpdate,
             detail="End date must be greater than or equal to start date"
         )
     
-    # Convert leave_type enum if present
-    if "leave_type" in update_data and update_data["leave_type"] is not None:
-        update_data["leave_type"] = LeaveTypeEnum(update_data["leave_type"].value)
-    
     # Update leave request
     for key, value in update_data.items():
         setattr(db_leave, key, value)
     
     db.commit()
     db.refresh(db_leave)
+    cache.invalidate(leave_request_key(leave_id))
     
-    return db_leave_to_schema(db_leave)
+    return db_leave
 
 
 @router.delete("/{leave_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Delete/Cancel leave request")
-async def delete_leave_request(leave_id: int, db: Session = Depends(get_db)):
+def delete_leave_request(leave_id: int, db: Session = Depends(get_db)):
     """
     Cancel a leave request
     
     - **leave_id**: The ID of the leave request to cancel
     - Only pending requests can be deleted
     """
-    db_leave = db.query(LeaveRequestModel).filter(LeaveRequestModel.id == leave_id).first()
+    # Lock the row so the pending-status check and the write can't interleave
+    db_leave = db.get(LeaveRequestModel, leave_id, with_for_update=True)
     
     if not db_leave:
         raise HTTPException(
@@ -222,12 +267,13 @@ async def delete_leave_request(leave_id: int, db: Session = Depends(get_db)):
     # Mark as cancelled instead of deleting
     db_leave.status = LeaveStatusEnum.CANCELLED
     db.commit()
+    cache.invalidate(leave_request_key(leave_id))
     
     return None
 
 
 @router.post("/{leave_id}/approve", response_model=LeaveRequest, summary="Approve or reject leave request")
-async def approve_leave_request(leave_id: int, approval: LeaveApproval, db: Session = Depends(get_db)):
+def approve_leave_request(leave_id: int, approval: LeaveApproval, db: Session = Depends(get_db)):
     """
     Approve or reject a leave request
     
@@ -236,7 +282,8 @@ async def approve_leave_request(leave_id: int, approval: LeaveApproval, db: Sess
     - **approved_by**: Employee ID of the approver (must exist)
     - **comments**: Optional comments for the approval/rejection
     """
-    db_leave = db.query(LeaveRequestModel).filter(LeaveRequestModel.id == leave_id).first()
+    # Lock the row so the pending-status check and the write can't interleave
+    db_leave = db.get(LeaveRequestModel, leave_id, with_for_update=True)
     
     if not db_leave:
         raise HTTPException(
@@ -252,7 +299,7 @@ async def approve_leave_request(leave_id: int, approval: LeaveApproval, db: Sess
         )
     
     # Validate approver exists
-    approver = db.query(EmployeeModel).filter(EmployeeModel.id == approval.approved_by).first()
+    approver = db.get(EmployeeModel, approval.approved_by)
     if not approver:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -265,41 +312,48 @@ async def approve_leave_request(leave_id: int, approval: LeaveApproval, db: Sess
     
     db.commit()
     db.refresh(db_leave)
+    cache.invalidate(leave_request_key(leave_id))
     
-    return db_leave_to_schema(db_leave)
+    return db_leave
 
 
 @router.get("/employee/{employee_id}/summary", summary="Get employee leave summary")
-async def get_employee_leave_summary(employee_id: int, db: Session = Depends(get_db)):
+def get_employee_leave_summary(employee_id: int, db: Session = Depends(get_db)):
     """
     Get leave summary for a specific employee
     
     - **employee_id**: The employee ID
     """
-    employee = db.query(EmployeeModel).filter(EmployeeModel.id == employee_id).first()
+    employee = db.get(EmployeeModel, employee_id)
     if not employee:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Employee with ID {employee_id} not found"
         )
     
-    employee_leaves = db.query(LeaveRequestModel).filter(LeaveRequestModel.employee_id == employee_id).all()
+    # Count per (status, leave_type) in the database; at most a couple dozen small rows come back
+    counts = db.query(
+        LeaveRequestModel.status,
+        LeaveRequestModel.leave_type,
+        func.count(LeaveRequestModel.id)
+    ).filter(
+        LeaveRequestModel.employee_id == employee_id
+    ).group_by(LeaveRequestModel.status, LeaveRequestModel.leave_type).all()
+    
+    by_status = dict.fromkeys(LeaveStatusEnum, 0)
+    by_type = dict.fromkeys(LeaveTypeEnum, 0)
+    for leave_status, leave_type, count in counts:
+        by_status[leave_status] += count
+        by_type[leave_type] += count
     
     summary = {
         "employee_id": employee_id,
-        "total_requests": len(employee_leaves),
-        "pending": sum(1 for lr in employee_leaves if lr.status == LeaveStatusEnum.PENDING),
-        "approved": sum(1 for lr in employee_leaves if lr.status == LeaveStatusEnum.APPROVED),
-        "rejected": sum(1 for lr in employee_leaves if lr.status == LeaveStatusEnum.REJECTED),
-        "cancelled": sum(1 for lr in employee_leaves if lr.status == LeaveStatusEnum.CANCELLED),
-        "by_type": {
-            "sick": sum(1 for lr in employee_leaves if lr.leave_type == LeaveTypeEnum.SICK),
-            "vacation": sum(1 for lr in employee_leaves if lr.leave_type == LeaveTypeEnum.VACATION),
-            "personal": sum(1 for lr in employee_leaves if lr.leave_type == LeaveTypeEnum.PERSONAL),
-            "unpaid": sum(1 for lr in employee_leaves if lr.leave_type == LeaveTypeEnum.UNPAID),
-            "maternity": sum(1 for lr in employee_leaves if lr.leave_type == LeaveTypeEnum.MATERNITY),
-            "paternity": sum(1 for lr in employee_leaves if lr.leave_type == LeaveTypeEnum.PATERNITY),
-        }
+        "total_requests": sum(by_status.values()),
+        "pending": by_status[LeaveStatusEnum.PENDING],
+        "approved": by_status[LeaveStatusEnum.APPROVED],
+        "rejected": by_status[LeaveStatusEnum.REJECTED],
+        "cancelled": by_status[LeaveStatusEnum.CANCELLED],
+        "by_type": {leave_type.value: count for leave_type, count in by_type.items()}
     }
     
     return summary
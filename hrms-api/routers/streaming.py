@@ -0,0 +1,28 @@
+"""
+Streaming JSON responses shared by the export endpoints
+"""
+from typing import Iterator
+from pydantic import TypeAdapter
+from database import SessionLocal
+
+
+def stream_json_array(statement, adapter: TypeAdapter, batch_size: int = 500) -> Iterator[bytes]:
+    """
+    Stream the ORM rows of a select() as a JSON array
+    Rows are fetched yield_per batch_size (a server-side cursor on PostgreSQL),
+    so at most one batch is held in memory regardless of result size.
+    Opens its own session: FastAPI closes get_db sessions before a
+    StreamingResponse body is sent.
+    """
+    db = SessionLocal()
+    try:
+        yield b"["
+        separator = b""
+        for batch in db.scalars(statement.execution_options(yield_per=batch_size)).partitions():
+            rows = adapter.validate_python(batch, from_attributes=True)
+            # dump_json gives "[...]"; strip the brackets and splice into the outer array
+            yield separator + adapter.dump_json(rows)[1:-1]
+            separator = b","
+        yield b"]"
+    finally:
+        db.close()
@@ -2,6 +2,7 @@
 Seed initial data into the database
 """
 from datetime import date
+from sqlalchemy import insert, update
 from database import SessionLocal, init_db
 from models.database_models import DepartmentModel, EmployeeModel, LeaveRequestModel
 from models.database_models import EmployeeStatusEnum, LeaveTypeEnum, LeaveStatusEnum
@@ -22,25 +23,25 @@ def seed_database():
         
         # Create Departments
         departments = [
-            DepartmentModel(
+            dict(
                 id=1,
                 name="Engineering",
                 description="Software development and engineering team",
                 manager_id=None  # Will update after creating employees
             ),
-            DepartmentModel(
+            dict(
                 id=2,
                 name="Human Resources",
                 description="HR and talent management",
                 manager_id=None
             ),
-            DepartmentModel(
+            dict(
                 id=3,
                 name="Sales",
                 description="Sales and business development",
                 manager_id=None
             ),
-            DepartmentModel(
+            dict(
                 id=4,
                 name="Marketing",
                 description="Marketing and communications",
@@ -48,14 +49,14 @@ def seed_database():
             ),
         ]
         
-        for dept in departments:
-            db.add(dept)
-        db.commit()
+        # Core insert of plain dicts: one multi-row INSERT per table,
+        # no per-object unit-of-work bookkeeping
+        db.execute(insert(DepartmentModel), departments)
         print("✅ Departments created")
         
         # Create Employees
         employees = [
-            EmployeeModel(
+            dict(
                 id=1,
                 first_name="John",
                 last_name="Doe",
@@ -67,7 +68,7 @@ def seed_database():
                 salary=95000.00,
                 status=EmployeeStatusEnum.ACTIVE
             ),
-            EmployeeModel(
+            dict(
                 id=2,
                 first_name="Jane",
                 last_name="Smith",
@@ -79,7 +80,7 @@ def seed_database():
                 salary=85000.00,
                 status=EmployeeStatusEnum.ACTIVE
             ),
-            EmployeeModel(
+            dict(
                 id=3,
                 first_name="Mike",
                 last_name="Johnson",
@@ -91,7 +92,7 @@ def seed_database():
                 salary=75000.00,
                 status=EmployeeStatusEnum.ACTIVE
             ),
-            EmployeeModel(
+            dict(
                 id=4,
                 first_name="Sarah",
                 last_name="Williams",
@@ -103,7 +104,7 @@ def seed_database():
                 salary=65000.00,
                 status=EmployeeStatusEnum.ACTIVE
             ),
-            EmployeeModel(
+            dict(
                 id=5,
                 first_name="David",
                 last_name="Brown",
@@ -117,24 +118,20 @@ def seed_database():
             ),
         ]
         
-        for emp in employees:
-            db.add(emp)
-        db.commit()
+        db.execute(insert(EmployeeModel), employees)
         print("✅ Employees created")
         
         # Update department managers
-        dept_eng = db.query(DepartmentModel).filter(DepartmentModel.id == 1).first()
-        dept_eng.manager_id = 1
-        
-        dept_hr = db.query(DepartmentModel).filter(DepartmentModel.id == 2).first()
-        dept_hr.manager_id = 2
-        
-        db.commit()
+        # ORM bulk UPDATE by primary key: one executemany, no per-row SELECT
+        db.execute(update(DepartmentModel), [
+            {"id": 1, "manager_id": 1},
+            {"id": 2, "manager_id": 2},
+        ])
         print("✅ Department managers assigned")
         
         # Create Leave Requests
         leave_requests = [
-            LeaveRequestModel(
+            dict(
                 id=1,
                 employee_id=3,
                 leave_type=LeaveTypeEnum.VACATION,
@@ -145,7 +142,7 @@ def seed_database():
                 approved_by=None,
                 created_at=date(2024, 12, 1)
             ),
-            LeaveRequestModel(
+            dict(
                 id=2,
                 employee_id=4,
                 leave_type=LeaveTypeEnum.SICK,
@@ -156,7 +153,7 @@ def seed_database():
                 approved_by=2,
                 created_at=date(2024, 11, 1)
             ),
-            LeaveRequestModel(
+            dict(
                 id=3,
                 employee_id=5,
                 leave_type=LeaveTypeEnum.PERSONAL,
@@ -169,8 +166,7 @@ def seed_database():
             ),
         ]
         
-        for leave in leave_requests:
-            db.add(leave)
+        db.execute(insert(LeaveRequestModel), leave_requests)
         db.commit()
         print("✅ Leave requests created")
         
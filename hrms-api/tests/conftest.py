@@ -0,0 +1,59 @@
+"""
+Test fixtures for the HRMS API
+Runs the app end to end against a throwaway SQLite database
+"""
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+# database.py reads DATABASE_URL at import time, so configure it before any app import
+TEST_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="hrms-test-"), "hrms.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{TEST_DB_PATH}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from main import app
+from database import engine
+from cache import cache
+from seed_data import seed_database
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Client over a seeded database; the lifespan hook creates the tables"""
+    with TestClient(app) as test_client:
+        seed_database()
+        yield test_client
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    """Start every test cold so cached reads still hit the database"""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@contextmanager
+def count_queries():
+    """Collect every SQL statement the engine executes inside the block"""
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+
+
+@pytest.fixture
+def query_counter():
+    """Expose count_queries to tests"""
+    return count_queries
@@ -0,0 +1,43 @@
+"""
+Query-count guards against N+1 regressions
+Each read endpoint must issue a fixed number of statements, however many rows it returns
+"""
+import pytest
+
+
+def add_departments(client, count):
+    for n in range(count):
+        response = client.post("/api/v1/departments/", json={"name": f"Query Count {n}", "description": "Test department"})
+        assert response.status_code == 201, response.text
+
+
+def test_department_list_query_count_is_independent_of_size(client, query_counter):
+    with query_counter() as before:
+        response = client.get("/api/v1/departments/")
+    assert response.status_code == 200
+    assert len(before) <= 2
+
+    add_departments(client, 20)
+
+    with query_counter() as after:
+        response = client.get("/api/v1/departments/")
+    assert response.status_code == 200
+    assert len(response.json()) >= 20
+    assert len(after) == len(before)
+
+
+@pytest.mark.parametrize("path, max_queries", [
+    ("/api/v1/departments/1", 1),
+    ("/api/v1/departments/1/stats", 2),
+    ("/api/v1/employees/", 1),
+    ("/api/v1/employees/1", 1),
+    ("/api/v1/employees/department/1/employees", 2),
+    ("/api/v1/leaves/", 1),
+    ("/api/v1/leaves/1", 1),
+    ("/api/v1/leaves/employee/1/summary", 2),
+])
+def test_read_endpoint_query_count(client, query_counter, path, max_queries):
+    with query_counter() as statements:
+        response = client.get(path)
+    assert response.status_code == 200, response.text
+    assert len(statements) <= max_queries, statements